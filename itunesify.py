@@ -3,12 +3,19 @@ import re
 import json
 import itunespy
 import requests
+import time
+import socket
+import uuid
+import hashlib
 import argparse
+import struct
+import threading
 import subprocess
 
 from mutagen import MutagenError
 from mutagen.flac import FLAC
 from mutagen.easyid3 import EasyID3
+from mutagen.id3 import TCON, ID3TimeStamp
 
 from urllib.parse import urlparse
 from io import BytesIO
@@ -52,13 +59,299 @@ class Track:
     def save_tags(self):
         self.audio_tags.save()
 
+class FastTags:
+    __slots__ = ("path", "audio_file_type", "tags")
+
+    ID3_FRAMES = {
+        "TPE1": "artist", "TALB": "album", "TIT2": "title", "TRCK": "tracknumber",
+        "TDRC": "date", "TCON": "genre", "TPE2": "albumartist",
+        "TPOS": "discnumber", "TCOP": "copyright",
+        "TYER": "TYER", "TDAT": "TDAT", "TIME": "TIME",
+        "TP1": "artist", "TAL": "album", "TT2": "title", "TRK": "tracknumber",
+        "TCO": "genre", "TP2": "albumartist", "TPA": "discnumber",
+        "TCR": "copyright", "TYE": "TYER", "TDA": "TDAT", "TIM": "TIME",
+    }
+    ID3_ENCODINGS = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}
+    ID3_FRAME_ID = re.compile(rb"[A-Z0-9]{3,4}")
+
+    def __init__(self, path, audio_file_type, tags):
+        self.path = path
+        self.audio_file_type = audio_file_type
+        self.tags = tags
+
+    def __getitem__(self, tag_name):
+        return self.tags[tag_name]
+
+    def __contains__(self, tag_name):
+        return tag_name in self.tags
+
+    def get(self, tag_name, default=None):
+        return self.tags.get(tag_name, default)
+
+    @classmethod
+    def from_flac(cls, path):
+        tags = {}
+        # Unreadable files are left to mutagen so they raise MutagenError as before
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return cls(path, "flac", dict(FLAC(path)))
+        with f:
+            file_size = os.fstat(f.fileno()).st_size
+            header = f.read(10)
+            if header[:3] == b"ID3" and len(header) == 10:
+                f.seek(10 + cls.syncsafe_int(header[6:10]))
+                header = f.read(4)
+            if header[:4] != b"fLaC":
+                return cls(path, "flac", dict(FLAC(path)))
+            f.seek(4 - len(header), 1)
+
+            is_last_block = False
+            while not is_last_block:
+                block_header = f.read(4)
+                if len(block_header) < 4:
+                    return cls(path, "flac", dict(FLAC(path)))
+                is_last_block = block_header[0] & 0x80
+                block_type = block_header[0] & 0x7F
+                block_size = int.from_bytes(block_header[1:4], "big")
+                # Truncated files are left to mutagen so it raises its usual errors
+                if f.tell() + block_size > file_size:
+                    return cls(path, "flac", dict(FLAC(path)))
+
+                # Only VORBIS_COMMENT is read, PICTURE and other blocks are seeked over
+                if block_type != 4:
+                    f.seek(block_size, 1)
+                    continue
+
+                block = f.read(block_size)
+                # Corrupt blocks are left to mutagen as well
+                try:
+                    vendor_size = struct.unpack_from("<I", block, 0)[0]
+                    offset = 4 + vendor_size
+                    comment_count = struct.unpack_from("<I", block, offset)[0]
+                    offset += 4
+                    for _ in range(comment_count):
+                        comment_size = struct.unpack_from("<I", block, offset)[0]
+                        offset += 4
+                        if offset + comment_size > block_size:
+                            raise struct.error("truncated Vorbis comment")
+                        comment = block[offset:offset + comment_size].decode("utf-8", "replace")
+                        offset += comment_size
+                        tag_name, _, value = comment.partition("=")
+                        tags.setdefault(tag_name.lower(), []).append(value)
+                except (struct.error, IndexError):
+                    return cls(path, "flac", dict(FLAC(path)))
+        return cls(path, "flac", tags)
+
+    @classmethod
+    def from_mp3(cls, path):
+        # Unreadable files are left to mutagen so they raise MutagenError as before
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return cls(path, "mp3", dict(EasyID3(path)))
+        with f:
+            file_size = os.fstat(f.fileno()).st_size
+            header = f.read(10)
+            if len(header) < 10 or header[:3] != b"ID3" or header[3] not in (2, 3, 4) or header[5] & 0x80:
+                return cls(path, "mp3", dict(EasyID3(path)))
+            version = header[3]
+            # ID3v2.2 uses this flag for tag-level compression
+            if version == 2 and header[5] & 0x40:
+                return cls(path, "mp3", dict(EasyID3(path)))
+            tag_size = cls.syncsafe_int(header[6:10])
+            # Truncated files are left to mutagen so it raises its usual errors
+            if 10 + tag_size > file_size:
+                return cls(path, "mp3", dict(EasyID3(path)))
+
+            if header[5] & 0x40:
+                extended_header = f.read(4)
+                if len(extended_header) < 4:
+                    return cls(path, "mp3", dict(EasyID3(path)))
+                if version == 3:
+                    f.seek(struct.unpack(">I", extended_header)[0], 1)
+                else:
+                    f.seek(cls.syncsafe_int(extended_header) - 4, 1)
+
+            tags = {}
+            frame_header_size = 6 if version == 2 else 10
+            while f.tell() + frame_header_size <= 10 + tag_size:
+                frame_header = f.read(frame_header_size)
+                if len(frame_header) < frame_header_size:
+                    return cls(path, "mp3", dict(EasyID3(path)))
+                if version == 2:
+                    frame_id = frame_header[:3]
+                    frame_size = int.from_bytes(frame_header[3:6], "big")
+                    frame_flags = 0
+                else:
+                    frame_id = frame_header[:4]
+                    frame_size = cls.syncsafe_int(frame_header[4:8]) if version == 4 else struct.unpack(">I", frame_header[4:8])[0]
+                    frame_flags = frame_header[9]
+                if not frame_id.strip(b"\x00"):
+                    break
+                # An invalid frame ID, a non-syncsafe v2.4 size or a frame overrunning the tag
+                # means the walk is out of sync, mutagen knows how to recover from those
+                if not cls.ID3_FRAME_ID.fullmatch(frame_id) or f.tell() + frame_size > 10 + tag_size:
+                    return cls(path, "mp3", dict(EasyID3(path)))
+                if version == 4 and any(byte & 0x80 for byte in frame_header[4:8]):
+                    return cls(path, "mp3", dict(EasyID3(path)))
+
+                tag_name = cls.ID3_FRAMES.get(frame_id.decode("latin-1"))
+                # Compressed, encrypted or unsynchronised frames are left to mutagen
+                if tag_name is not None and frame_flags & (0xE0 if version == 3 else 0x4F):
+                    return cls(path, "mp3", dict(EasyID3(path)))
+                # APIC and any frame without an EasyID3 key are seeked over without decoding
+                if tag_name is None or tag_name in tags:
+                    f.seek(frame_size, 1)
+                    continue
+
+                frame_data = f.read(frame_size)
+                if not frame_data or frame_data[0] not in cls.ID3_ENCODINGS:
+                    continue
+                text = frame_data[1:].decode(cls.ID3_ENCODINGS[frame_data[0]], "replace")
+                values = [value.lstrip("\ufeff") for value in text.split("\x00") if value.lstrip("\ufeff")]
+                if tag_name == "genre":
+                    values = TCON(encoding=3, text=values).genres
+                elif tag_name == "date":
+                    values = [ID3TimeStamp(value).text for value in values]
+                if values:
+                    tags[tag_name] = values
+
+        # Older tags split the date over TYER, TDAT and TIME, which mutagen merges into TDRC
+        date_frames = ["\x00".join(tags.pop(frame_name, [])) for frame_name in ("TYER", "TDAT", "TIME")]
+        if "date" not in tags:
+            timestamp = cls.merge_id3_date(*date_frames)
+            if timestamp:
+                tags["date"] = [ID3TimeStamp(timestamp).text]
+        return cls(path, "mp3", tags)
+
+    @staticmethod
+    def merge_id3_date(year, day_month, time_of_day):
+        year_match = re.match(r"([0-9]{4})(-[0-9]{2}-[0-9]{2})?\Z", year)
+        if not year_match:
+            return None
+        timestamp, month_day = year_match.groups()
+
+        day_month_match = re.match(r"([0-9]{2})([0-9]{2})\Z", day_month)
+        if day_month_match:
+            month_day = "-%s-%s" % day_month_match.groups()[::-1]
+        if month_day:
+            timestamp += month_day
+            time_match = re.match(r"([0-9]{2})([0-9]{2})\Z", time_of_day)
+            if time_match:
+                timestamp += "T%s:%s:00" % time_match.groups()
+        return timestamp
+
+    @staticmethod
+    def syncsafe_int(data):
+        return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+class CollectionLock:
+    def __init__(self, lock_path, worker_id, lock_timeout):
+        self.lock_path = lock_path
+        self.worker_id = worker_id
+        self.lock_timeout = lock_timeout
+        self.token = uuid.uuid4().hex
+        self.heartbeat_stop = threading.Event()
+        self.heartbeat_thread = None
+
+    @staticmethod
+    def filesystem_time(directory, worker_id):
+        # Lock mtimes are set by the file server, so lock ages are measured against its clock
+        # rather than the local one, which may be skewed on other hosts
+        clock_path = os.path.join(directory, f"{worker_id}.{uuid.uuid4().hex}.clock")
+        with open(clock_path, "w"):
+            pass
+        try:
+            os.utime(clock_path)
+            return os.path.getmtime(clock_path)
+        finally:
+            os.remove(clock_path)
+
+    def lock_age(self, lock_path):
+        return self.filesystem_time(os.path.dirname(self.lock_path), self.worker_id) - os.path.getmtime(lock_path)
+
+    def is_stale(self):
+        try:
+            return self.lock_age(self.lock_path) > self.lock_timeout
+        except FileNotFoundError:
+            return False
+
+    def break_stale_lock(self):
+        stale_path = f"{self.lock_path}.{self.worker_id}.stale"
+        try:
+            os.rename(self.lock_path, stale_path)
+        except FileNotFoundError:
+            return
+
+        # Another worker may have replaced the stale lock with a live one before our rename
+        if self.lock_age(stale_path) <= self.lock_timeout:
+            self.restore_lock(stale_path)
+            return
+        os.remove(stale_path)
+
+    def owns_lock(self):
+        try:
+            with open(self.lock_path, "r") as f:
+                return json.load(f).get("token") == self.token
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def restore_lock(self, moved_path):
+        try:
+            os.link(moved_path, self.lock_path)
+        except FileExistsError:
+            pass
+        os.remove(moved_path)
+
+    def acquire(self):
+        for _ in range(2):
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self.is_stale():
+                    return False
+                self.break_stale_lock()
+                continue
+
+            with os.fdopen(fd, "w") as f:
+                json.dump({"worker_id": self.worker_id, "token": self.token, "claimed_at": time.time()}, f)
+
+            self.heartbeat_thread = threading.Thread(target=self.heartbeat, daemon=True)
+            self.heartbeat_thread.start()
+            return True
+        return False
+
+    def heartbeat(self):
+        while not self.heartbeat_stop.wait(self.lock_timeout / 3):
+            # Stop refreshing once another worker has taken over the lock
+            if not self.owns_lock():
+                return
+            try:
+                os.utime(self.lock_path)
+            except FileNotFoundError:
+                return
+
+    def release(self):
+        self.heartbeat_stop.set()
+        if self.heartbeat_thread is not None:
+            self.heartbeat_thread.join()
+
+        # Leave the lock alone if another worker took it over after ours went stale
+        if not self.owns_lock():
+            return
+        try:
+            os.remove(self.lock_path)
+        except FileNotFoundError:
+            pass
+
 class iTunesify:
     def load_config(self, config_file):
         with open(config_file, "r") as f:
             config = json.load(f)
         return config
 
-    def __init__(self, music_directory_arg=None, config_file=None):
+    def __init__(self, music_directory_arg=None, config_file=None, worker_id=None, lock_timeout=300, retry_skipped=False):
         if config_file is None:
             config_file = os.path.join(os.path.dirname(__file__), "config.json")
         config = self.load_config(config_file)
@@ -72,6 +365,12 @@ class iTunesify:
         elif not self.music_directory or self.music_directory == "/path/to/your/music/directory":
             self.music_directory = console.input("[b]Enter the path of a music directory you wish to iTunesify (you can drag and drop):[/b] ").rstrip().strip("\"").strip("'\"")
 
+        self.lock_directory = config.get("lock_directory") or os.path.join(self.music_directory, ".itunesify")
+        self.worker_id = worker_id
+        self.lock_timeout = lock_timeout
+        self.retry_skipped = retry_skipped
+        self.run_started_at = None
+
     def display_success_message(self, itunes_collection, audio_file_type):
         num_tracks = len(itunes_collection.get_tracks())
         files_str = "file" if num_tracks == 1 else "files"
@@ -220,7 +519,7 @@ class iTunesify:
             return "mp3"
 
     def retag_files(self, local_tracks, itunes_collection):
-        local_tracks_sorted = sorted(local_tracks, key=lambda x: int(self.get_audio_tags(x)["tracknumber"][0]))
+        local_tracks_sorted = sorted(local_tracks, key=lambda x: int(self.get_fast_tags(x)["tracknumber"][0]))
         console.print(end="")
         with Progress() as progress:
             task = progress.add_task("Retagging files", total=len(local_tracks_sorted))
@@ -310,7 +609,7 @@ class iTunesify:
         console.print(search_results_table)
 
     def handle_collection_selection(self, itunes_collections, local_tracks):
-        local_tracks_sorted = sorted(local_tracks, key=lambda x: int(self.get_audio_tags(x)["tracknumber"][0]))
+        local_tracks_sorted = sorted(local_tracks, key=lambda x: int(self.get_fast_tags(x)["tracknumber"][0]))
 
         if not itunes_collections:
             self.print_local_tags(local_tracks_sorted)
@@ -394,8 +693,15 @@ class iTunesify:
             local_audio_tags = EasyID3(local_audio_file)
         return local_audio_tags
 
+    def get_fast_tags(self, local_audio_file):
+        if local_audio_file.endswith(".flac"):
+            local_audio_tags = FastTags.from_flac(local_audio_file)
+        elif local_audio_file.endswith(".mp3"):
+            local_audio_tags = FastTags.from_mp3(local_audio_file)
+        return local_audio_tags
+
     def print_local_tags(self, local_tracks):
-        local_tracks_sorted = sorted(local_tracks, key=lambda x: int(self.get_audio_tags(x)["tracknumber"][0]))
+        local_tracks_sorted = sorted(local_tracks, key=lambda x: int(self.get_fast_tags(x)["tracknumber"][0]))
         local_artist_name, local_collection_name, local_release_date, local_genre = self.get_local_tags(local_tracks_sorted)
 
         table = Table(show_header=True, box=box.ROUNDED, border_style="magenta")
@@ -413,7 +719,7 @@ class iTunesify:
 
         local_tracks_by_disc = {}
         for local_audio_file in local_tracks_sorted:
-            track_tags = self.get_audio_tags(local_audio_file)
+            track_tags = self.get_fast_tags(local_audio_file)
             local_track = Track(local_audio_file, track_tags, self.get_file_type(local_audio_file))
 
             local_disc_number = int(track_tags.get("discnumber", [1])[0])
@@ -448,7 +754,7 @@ class iTunesify:
     def get_local_tags(self, local_tracks):
         local_artist_name = local_collection_name = local_release_date = local_genre = None
         for local_track in local_tracks:
-            local_audio_tags = self.get_audio_tags(local_track)
+            local_audio_tags = self.get_fast_tags(local_track)
             if not local_artist_name:
                 local_artist_name = local_audio_tags["artist"][0]
             if not local_collection_name:
@@ -487,7 +793,7 @@ class iTunesify:
 
         for local_track in local_tracks:
             try:
-                audio = FLAC(local_track)
+                audio = FastTags.from_flac(local_track)
             except MutagenError:
                 continue
 
@@ -642,39 +948,237 @@ class iTunesify:
                     local_tracks.append(os.path.join(root, file))
         return local_tracks
 
-    def itunesify(self):
-        for artist_dir in os.listdir(self.music_directory):
+    def get_collection_key(self, artist_dir, collection_dir):
+        return hashlib.sha1(f"{artist_dir}/{collection_dir}".encode("utf-8")).hexdigest()
+
+    def get_pending_collections(self):
+        pending_collections = []
+        for artist_dir in sorted(os.listdir(self.music_directory)):
             if artist_dir.startswith("."):
                 continue
             artist_path = os.path.join(self.music_directory, artist_dir)
+            if not os.path.isdir(artist_path):
+                continue
             for collection_dir in sorted(os.listdir(artist_path)):
                 if collection_dir.startswith("."):
                     continue
                 collection_path = os.path.join(artist_path, collection_dir)
-                local_tracks = self.find_audio_files(collection_path)
                 if "Albums" in collection_path or "Singles & EPs" in collection_path:
                     continue
-                itunes_collection, confirm = self.search_itunes_collection(local_tracks)
-                if itunes_collection is None:
+                pending_collections.append((artist_dir, collection_dir))
+        return pending_collections
+
+    def was_skipped(self, artist_dir, collection_dir):
+        collection_key = self.get_collection_key(artist_dir, collection_dir)
+        try:
+            skipped_at = os.path.getmtime(os.path.join(self.lock_directory, "skipped", f"{collection_key}.json"))
+        except FileNotFoundError:
+            return False
+        if self.retry_skipped and skipped_at < self.run_started_at:
+            return False
+
+        # A skipped collection comes back once its folder changes
+        try:
+            return os.path.getmtime(os.path.join(self.music_directory, artist_dir, collection_dir)) <= skipped_at
+        except FileNotFoundError:
+            return True
+
+    def claim_collection(self, artist_dir, collection_dir):
+        locks_path = os.path.join(self.lock_directory, "locks")
+        os.makedirs(locks_path, exist_ok=True)
+
+        # Tagged collections are moved out of the scan, so done/ records are only used by --status
+        if self.was_skipped(artist_dir, collection_dir):
+            return None
+
+        collection_key = self.get_collection_key(artist_dir, collection_dir)
+        collection_lock = CollectionLock(os.path.join(locks_path, f"{collection_key}.lock"), self.worker_id, self.lock_timeout)
+        if not collection_lock.acquire():
+            return None
+
+        # Another worker may have skipped the collection between the check above and our claim
+        if self.was_skipped(artist_dir, collection_dir):
+            collection_lock.release()
+            return None
+        return collection_lock
+
+    def record_collection(self, artist_dir, collection_dir, status, track_count, started_at):
+        # Skipped collections are not claimed again until their folder changes or --retry-skipped is passed
+        records_path = os.path.join(self.lock_directory, "done" if status == "tagged" else "skipped")
+        os.makedirs(records_path, exist_ok=True)
+
+        collection_key = self.get_collection_key(artist_dir, collection_dir)
+        record_file = os.path.join(records_path, f"{collection_key}.json")
+        record_data = {
+            "artist": artist_dir,
+            "collection": collection_dir,
+            "status": status,
+            "worker_id": self.worker_id,
+            "track_count": track_count,
+            "started_at": started_at,
+            "finished_at": time.time(),
+        }
+
+        tmp_file = f"{record_file}.{self.worker_id}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(record_data, f)
+        os.replace(tmp_file, record_file)
+
+    def load_collection_records(self, records_dir):
+        records_path = os.path.join(self.lock_directory, records_dir)
+        collection_records = []
+        if os.path.isdir(records_path):
+            for record_file in os.listdir(records_path):
+                if not record_file.endswith(".json"):
                     continue
-                elif confirm:
-                    organize_folder = self.ask_to_organize_folder()
-                    if not organize_folder:
-                        continue
+                with open(os.path.join(records_path, record_file), "r") as f:
+                    collection_records.append(json.load(f))
+        return collection_records
+
+    def process_collection(self, collection_path, artist_path):
+        local_tracks = self.find_audio_files(collection_path)
+        itunes_collection, confirm = self.search_itunes_collection(local_tracks)
+        if itunes_collection is None or not confirm:
+            return "skipped", len(local_tracks)
+
+        organize_folder = self.ask_to_organize_folder()
+        if not organize_folder:
+            return "skipped", len(local_tracks)
+
+        self.retag_files(local_tracks, itunes_collection)
+        self.save_itunes_cover(collection_path, itunes_collection)
+        self.move_files(local_tracks, self.replace_censored_text(itunes_collection.collection_censored_name), itunes_collection.parsed_release_date.year, collection_path, artist_path)
+        self.display_success_message(itunes_collection, self.get_file_type(local_tracks[0]).upper())
+        return "tagged", len(local_tracks)
+
+    def itunesify(self):
+        if self.worker_id is not None:
+            locks_path = os.path.join(self.lock_directory, "locks")
+            os.makedirs(locks_path, exist_ok=True)
+            self.run_started_at = CollectionLock.filesystem_time(locks_path, self.worker_id)
+
+        for artist_dir, collection_dir in self.get_pending_collections():
+            artist_path = os.path.join(self.music_directory, artist_dir)
+            collection_path = os.path.join(artist_path, collection_dir)
+
+            if self.worker_id is None:
+                self.process_collection(collection_path, artist_path)
+                continue
+
+            collection_lock = self.claim_collection(artist_dir, collection_dir)
+            if collection_lock is None:
+                continue
+
+            try:
+                if not os.path.isdir(collection_path):
+                    continue
+                console.print(f"\n[b][orchid]Worker [gold1]{self.worker_id}[/gold1] claimed [gold1]{artist_dir}[/gold1] - [gold1]{collection_dir}[/gold1][/orchid][/b]")
+                started_at = time.time()
+                status, track_count = self.process_collection(collection_path, artist_path)
+                self.record_collection(artist_dir, collection_dir, status, track_count, started_at)
+            finally:
+                collection_lock.release()
+
+    def print_worker_status(self):
+        locks_path = os.path.join(self.lock_directory, "locks")
+        done_collections = self.load_collection_records("done")
+        skipped_collections = self.load_collection_records("skipped")
+
+        active_locks = []
+        if os.path.isdir(locks_path):
+            filesystem_now = CollectionLock.filesystem_time(locks_path, self.worker_id)
+            for lock_file in os.listdir(locks_path):
+                if not lock_file.endswith(".lock"):
+                    continue
+                lock_path = os.path.join(locks_path, lock_file)
+                try:
+                    with open(lock_path, "r") as f:
+                        lock_data = json.load(f)
+                    heartbeat_age = filesystem_now - os.path.getmtime(lock_path)
+                except (FileNotFoundError, ValueError):
+                    continue
+                active_locks.append((lock_data, heartbeat_age))
+
+        pending_keys = {self.get_collection_key(a, c) for a, c in self.get_pending_collections()}
+        skipped_count = sum(1 for d in skipped_collections if self.get_collection_key(d["artist"], d["collection"]) in pending_keys)
+        remaining_count = len(pending_keys)
+        total_count = len(done_collections) + remaining_count
+
+        summary_table = Table(show_header=True, box=box.ROUNDED, border_style="gold3")
+        summary_table.add_column("Collections")
+        summary_table.add_column("Count", justify="right")
+        summary_table.add_row("[b]Total[/b]", f"[gold1]{total_count}[/gold1]")
+        summary_table.add_row("[b]Tagged[/b]", f"[gold1]{len(done_collections)}[/gold1]")
+        summary_table.add_row("[b]Skipped (still remaining)[/b]", f"[gold1]{skipped_count}[/gold1]")
+        summary_table.add_row("[b]In progress[/b]", f"[gold1]{sum(1 for _, age in active_locks if age <= self.lock_timeout)}[/gold1]")
+        summary_table.add_row("[b]Stale locks[/b]", f"[gold1]{sum(1 for _, age in active_locks if age > self.lock_timeout)}[/gold1]")
+        summary_table.add_row("[b]Remaining[/b]", f"[gold1]{remaining_count}[/gold1]")
+
+        console.print("\n[b][gold1]Worker progress:[/gold1][/b]")
+        console.print(summary_table)
+
+        workers = {}
+        for collection_record in done_collections + skipped_collections:
+            worker = workers.setdefault(collection_record["worker_id"], {"tagged": 0, "skipped": 0, "tracks": 0, "started_at": None, "finished_at": None, "current": None})
+            if collection_record["status"] == "tagged":
+                worker["tagged"] += 1
+                worker["tracks"] += collection_record["track_count"]
+            else:
+                worker["skipped"] += 1
+            if worker["started_at"] is None or collection_record["started_at"] < worker["started_at"]:
+                worker["started_at"] = collection_record["started_at"]
+            if worker["finished_at"] is None or collection_record["finished_at"] > worker["finished_at"]:
+                worker["finished_at"] = collection_record["finished_at"]
+        for lock_data, heartbeat_age in active_locks:
+            worker = workers.setdefault(lock_data["worker_id"], {"tagged": 0, "skipped": 0, "tracks": 0, "started_at": None, "finished_at": None, "current": None})
+            worker["current"] = "[red]Stale[/red]" if heartbeat_age > self.lock_timeout else f"Active ({heartbeat_age:.0f}s since heartbeat)"
+
+        workers_table = Table(show_header=True, box=box.ROUNDED, border_style="gold3")
+        workers_table.add_column("Worker")
+        workers_table.add_column("Tagged", justify="right")
+        workers_table.add_column("Skipped", justify="right")
+        workers_table.add_column("Tracks", justify="right")
+        workers_table.add_column("Collections/h", justify="right")
+        workers_table.add_column("Tracks/h", justify="right")
+        workers_table.add_column("Lock", justify="center")
+
+        for worker_id in sorted(workers):
+            worker = workers[worker_id]
+            elapsed_hours = (worker["finished_at"] - worker["started_at"]) / 3600 if worker["started_at"] is not None else 0
+            collections_per_hour = f"{(worker['tagged'] + worker['skipped']) / elapsed_hours:.1f}" if elapsed_hours > 0 else "-"
+            tracks_per_hour = f"{worker['tracks'] / elapsed_hours:.1f}" if elapsed_hours > 0 else "-"
+            workers_table.add_row(
+                worker_id,
+                str(worker["tagged"]),
+                str(worker["skipped"]),
+                str(worker["tracks"]),
+                collections_per_hour,
+                tracks_per_hour,
+                worker["current"] or "Idle",
+            )
 
-                    self.retag_files(local_tracks, itunes_collection)
-                    self.save_itunes_cover(collection_path, itunes_collection)
-                    self.move_files(local_tracks, self.replace_censored_text(itunes_collection.collection_censored_name), itunes_collection.parsed_release_date.year, collection_path, artist_path)
-                    self.display_success_message(itunes_collection, self.get_file_type(local_tracks[0]).upper())
+        console.print("\n[b][gold1]Workers:[/gold1][/b]")
+        console.print(workers_table)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="iTunesify your music collection.")
     parser.add_argument("-d", "--directory", help="Specify the music directory to iTunesify.")
     parser.add_argument("-c", "--config", help="Specify a custom config file.", default="config.json")
+    parser.add_argument("-w", "--worker", action="store_true", help="Run as a worker that claims collections through lock files shared with other workers.")
+    parser.add_argument("--worker-id", help="Specify the worker name shown in the status report.", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--lock-timeout", type=int, help="Seconds without a heartbeat after which a worker lock is considered stale.", default=300)
+    parser.add_argument("--retry-skipped", action="store_true", help="Claim collections skipped by earlier worker runs again.")
+    parser.add_argument("-s", "--status", action="store_true", help="Report progress and throughput across workers.")
     args = parser.parse_args()
+    if args.lock_timeout <= 0:
+        parser.error("--lock-timeout must be a positive number of seconds.")
 
     install()
     console = Console()
 
-    itunesify = iTunesify(args.directory, args.config)
-    itunesify.itunesify()
+    worker_id = args.worker_id if args.worker or args.status else None
+    itunesify = iTunesify(args.directory, args.config, worker_id, args.lock_timeout, args.retry_skipped)
+    if args.status:
+        itunesify.print_worker_status()
+    else:
+        itunesify.itunesify()